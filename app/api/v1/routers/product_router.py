@@ -1,14 +1,21 @@
 from decimal import Decimal
-from typing import Optional, Dict
+from typing import AsyncIterator, Dict, Optional
 
+import orjson
+from arq import ArqRedis
+from arq.jobs import Job, JobStatus
+from async_lru import alru_cache
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.dependencies.repository_dep import get_session_with_commit
-from app.schemas.product_schema import SProductsList
+from app.core.config import settings
+from app.dependencies.queue_dep import get_arq_pool
+from app.dependencies.repository_dep import get_session_maker
+from app.schemas.product_schema import PRODUCTS_ADAPTER, SProductsList
 from app.services.product_service import ProductService
-from app.services.wb_parser import WildberriesParser
 
 router = APIRouter()
 
@@ -16,53 +23,86 @@ router = APIRouter()
 @router.post("/parse")
 async def parsing(query: str,
                   limit: int,
-                  session: AsyncSession = Depends(get_session_with_commit), ) -> Dict:
+                  arq: ArqRedis = Depends(get_arq_pool), ) -> Dict:
     """
-    Эндпоинт выполняет парсинг данных с сайта wildberries и сохраняет их в БД
+    Эндпоинт ставит в очередь задачу парсинга данных с сайта wildberries и сохранения их в БД
+
+    Парсинг выполняется воркером ARQ (arq app.worker.WorkerSettings), статус задачи
+    можно получить через GET /parse/{job_id}.
 
     :param query: Поисковый запрос (например, "телефон").
     :param limit: Максимальное количество товаров для парсинга.
-    :param session: Асинхронная сессия БД (автоматически внедряется).
-    :return: сообщение об успешном парсинге и сохранении товаров в БД
+    :param arq: Пул соединений с очередью задач (автоматически внедряется).
+    :return: идентификатор поставленной в очередь задачи
 
     Raises:
         HTTPException: 500 - При возникновении внутренних ошибок сервера.
     """
-    service = ProductService(session=session)
-    parser = WildberriesParser(product_service=service, limit=limit)
     try:
-        result = await parser.parse_and_save(query)
+        job = await arq.enqueue_job("parse_job", query, limit)
     except Exception as e:
-        logger.error(f"Ошибка в /products: {str(e)}")
+        logger.error("Ошибка в /parse: {}", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    return {"message": f"Сохранено {result} товаров"}
+    return {"job_id": job.job_id, "message": "Задача парсинга поставлена в очередь"}
+
+
+@router.get("/parse/{job_id}")
+async def parsing_status(job_id: str, arq: ArqRedis = Depends(get_arq_pool)) -> Dict:
+    """
+    Эндпоинт возвращает статус задачи парсинга
+
+    :param job_id: Идентификатор задачи, полученный от POST /parse.
+    :param arq: Пул соединений с очередью задач (автоматически внедряется).
+    :return: статус задачи и, если она завершена, количество сохраненных товаров
+
+    Raises:
+        HTTPException: 404 - Задача не найдена.
+    """
+    job = Job(job_id, redis=arq)
+    status = await job.status()
+    if status == JobStatus.not_found:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = {"job_id": job_id, "status": status.value}
+    if status == JobStatus.complete:
+        info = await job.result_info()
+        if info.success:
+            response["message"] = f"Сохранено {info.result} товаров"
+        else:
+            response["message"] = "Ошибка при парсинге"
+    return response
 
 
 @router.get("/products", response_model=SProductsList)
 async def get_product_list(
     query: str,
     limit: int,
-    session: AsyncSession = Depends(get_session_with_commit),
     category: Optional[str] = None,
     min_price: Optional[Decimal] = None,
     max_price: Optional[Decimal] = None,
     min_rating: Optional[float] = None,
     min_reviews_count: Optional[int] = None,
+    exact_match: bool = False,
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
 ):
     """Получение  товаров с Wildberries из БД.
 
     Эндпоинт выполняет поиск товаров по заданному запросу в БД и возвращает отфильтрованный список.
+    Ответы кэшируются на PRODUCTS_CACHE_TTL секунд по набору параметров запроса.
+    При limit больше PRODUCTS_STREAM_THRESHOLD список не кэшируется, а передается
+    потоком по мере чтения из БД (формат ответа тот же).
 
     Args:
         query: Поисковый запрос (например, "телефон").
         limit: Максимальное количество товаров для вывода.
-        session: Асинхронная сессия БД (автоматически внедряется).
         category: Фильтр по категории товара (опционально).
         min_price: Минимальная цена товара (опционально).
         max_price: Максимальная цена товара (опционально).
         min_rating: Минимальный рейтинг товара (опционально).
         min_reviews_count: Минимальное количество отзывов (опционально).
+        exact_match: Искать товары, сохраненные по этому же запросу в /parse (опционально).
+        session_maker: Фабрика сессий БД (автоматически внедряется).
 
     Returns:
         SProductsList: Объект со списком товаров
@@ -88,9 +128,60 @@ async def get_product_list(
             ]
         }
     """
+    filters = (
+        session_maker,
+        query,
+        limit,
+        category,
+        min_price,
+        max_price,
+        min_rating,
+        min_reviews_count,
+        exact_match,
+    )
+    if limit > settings.PRODUCTS_STREAM_THRESHOLD:
+        body = _stream_product_list(*filters)
+        try:
+            # Первая часть ответа готовится до отправки статуса, поэтому ошибки
+            # подключения и запроса к БД еще возвращаются как 500
+            head = await anext(body)
+        except Exception as e:
+            logger.error("Ошибка в потоковом /products: {}", e)
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+        return StreamingResponse(
+            _prepend(head, body), media_type="application/json"
+        )
+
     try:
-        service = ProductService(session=session)
+        payload = await _cached_product_list(*filters)
+        return ORJSONResponse(payload)
+
+    except Exception as e:
+        logger.error("Ошибка в /products: {}", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@alru_cache(maxsize=1024, ttl=settings.PRODUCTS_CACHE_TTL)
+async def _cached_product_list(
+    session_maker: async_sessionmaker[AsyncSession],
+    query: str,
+    limit: int,
+    category: Optional[str],
+    min_price: Optional[Decimal],
+    max_price: Optional[Decimal],
+    min_rating: Optional[float],
+    min_reviews_count: Optional[int],
+    exact_match: bool,
+) -> Dict:
+    """
+    Список товаров в виде готового к отдаче JSON-совместимого словаря.
 
+    Результат кэшируется по набору фильтров, для запроса в БД открывается
+    собственная короткая сессия из session_maker.
+    """
+    async with session_maker() as session:
+        service = ProductService(session=session)
         products = await service.product_list(
             search_query=query,
             category=category,
@@ -98,11 +189,65 @@ async def get_product_list(
             max_price=max_price,
             min_rating=min_rating,
             min_reviews_count=min_reviews_count,
+            exact_match=exact_match,
             limit=limit
         )
 
-        return SProductsList(products=products)
+    # Ответ уже провалидирован адаптером, поэтому отдается готовым ORJSONResponse,
+    # без повторной проверки через response_model
+    products = PRODUCTS_ADAPTER.validate_python(products)
+    return {"products": PRODUCTS_ADAPTER.dump_python(products, mode="json")}
 
-    except Exception as e:
-        logger.error(f"Ошибка в /products: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def _stream_product_list(
+    session_maker: async_sessionmaker[AsyncSession],
+    query: str,
+    limit: int,
+    category: Optional[str],
+    min_price: Optional[Decimal],
+    max_price: Optional[Decimal],
+    min_rating: Optional[float],
+    min_reviews_count: Optional[int],
+    exact_match: bool,
+) -> AsyncIterator[bytes]:
+    """
+    Список товаров в виде JSON {"products": [...]}, записываемого по частям.
+
+    Сессия открывается внутри генератора, так как должна жить до отправки
+    последней строки ответа. Первая часть отдается только после чтения первой
+    строки из БД. Decimal сериализуется строкой, как в SProductResponse.
+    """
+    async with session_maker() as session:
+        service = ProductService(session=session)
+        rows = service.iter_product_list(
+            search_query=query,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            min_reviews_count=min_reviews_count,
+            exact_match=exact_match,
+            limit=limit
+        )
+        first = await anext(rows, None)
+        yield b'{"products":[' + (b"" if first is None else _dump_row(first))
+        try:
+            async for row in rows:
+                yield b"," + _dump_row(row)
+        except Exception as e:
+            # Статус ответа уже отправлен, поэтому поток просто обрывается
+            logger.error("Ошибка в потоковом /products: {}", e)
+            raise
+    yield b"]}"
+
+
+def _dump_row(row: RowMapping) -> bytes:
+    """Строка товара из БД в виде JSON-объекта."""
+    return orjson.dumps(dict(row), default=str)
+
+
+async def _prepend(head: bytes, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Поток ответа: уже прочитанная первая часть, затем остальные части body."""
+    yield head
+    async for chunk in body:
+        yield chunk
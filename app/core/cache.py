@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Простой LRU-кэш в памяти процесса с ограниченным временем жизни записей.
+
+    Attributes:
+        maxsize (int): Максимальное количество записей, самые старые вытесняются.
+        ttl (float): Время жизни записи в секундах.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Инициализация кэша.
+
+        Args:
+            maxsize: Максимальное количество записей.
+            ttl: Время жизни записи в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значение по ключу или None, если записи нет или она устарела."""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение, вытесняя самую давнюю запись при переполнении."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Очистка кэша."""
+        self._data.clear()
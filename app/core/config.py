@@ -1,3 +1,4 @@
+from arq.connections import RedisSettings
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,6 +11,28 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
 
+    # Пул соединений с БД
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_COMMAND_TIMEOUT: int = 30
+    # Подключение через PgBouncer (transaction pooling): пул держит PgBouncer
+    DB_USE_PGBOUNCER: bool = False
+
+    # Очередь фоновых задач парсинга (ARQ)
+    REDIS_HOST: str = "redis"
+    REDIS_PORT: int = 6379
+
+    LOG_LEVEL: str = "INFO"
+
+    # Время жизни кэша ответов GET /api/products, секунды
+    PRODUCTS_CACHE_TTL: int = 60
+    # Время жизни кэша результатов поиска на Wildberries, секунды
+    WB_SEARCH_CACHE_TTL: int = 300
+    # Начиная с какого limit список товаров отдается потоком, без кэша
+    PRODUCTS_STREAM_THRESHOLD: int = 1000
+
     model_config = SettingsConfigDict(env_file=(".env", ".test.env"), extra="allow")
 
 
@@ -31,3 +54,13 @@ def get_db_url():
 
 
 database_url = get_db_url()
+
+
+def get_redis_settings() -> RedisSettings:
+    """
+    Формирует параметры подключения к Redis для очереди задач ARQ.
+
+    :return: Настройки подключения к Redis
+    :rtype: RedisSettings
+    """
+    return RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
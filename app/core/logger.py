@@ -0,0 +1,16 @@
+import sys
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+def setup_logging() -> None:
+    """
+    Настройка loguru для приложения и воркера.
+
+    Записи ставятся в очередь (enqueue=True) и пишутся в stderr фоновым потоком,
+    поэтому логирование не блокирует цикл событий.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level=settings.LOG_LEVEL, enqueue=True)
@@ -0,0 +1,15 @@
+import asyncio
+import os
+
+
+def install_uvloop() -> None:
+    """
+    Установка uvloop в качестве цикла событий.
+
+    На Windows uvloop недоступен, там остается стандартный цикл asyncio.
+    """
+    if os.name == "nt":
+        return
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
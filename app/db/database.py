@@ -1,16 +1,47 @@
 import uuid
 
+from sqlalchemy import NullPool
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import (AsyncAttrs, AsyncSession,
                                     async_sessionmaker, create_async_engine)
 from sqlalchemy.orm import (DeclarativeBase, Mapped, declared_attr,
                             mapped_column)
 
-from app.core.config import database_url
+from app.core.config import database_url, settings
 
-engine = create_async_engine(url=database_url)
+
+def get_engine_options() -> dict:
+    """
+    Формирует параметры пула соединений и драйвера asyncpg из настроек.
+
+    :return: Именованные аргументы для create_async_engine
+    :rtype: dict
+    """
+    connect_args = {
+        "server_settings": {"jit": "off"},
+        "command_timeout": settings.DB_COMMAND_TIMEOUT,
+    }
+    if settings.DB_USE_PGBOUNCER:
+        # PgBouncer в режиме transaction не поддерживает именованные prepared statements
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = (
+            lambda: f"__asyncpg_{uuid.uuid4()}__"
+        )
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+
+engine = create_async_engine(url=database_url, **get_engine_options())
 async_session_maker = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=True
+    engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
@@ -0,0 +1,7 @@
+from arq import ArqRedis
+from fastapi import Request
+
+
+def get_arq_pool(request: Request) -> ArqRedis:
+    """Пул соединений с очередью задач ARQ, созданный в lifespan."""
+    return request.app.state.arq
@@ -1,10 +1,15 @@
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.db.database import async_session_maker
 
 
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    """Фабрика сессий для эндпоинтов, которые сами управляют временем жизни сессии."""
+    return async_session_maker
+
+
 async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
     """Асинхронная сессия с автоматическим коммитом."""
     async with async_session_maker() as session:
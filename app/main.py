@@ -1,19 +1,28 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from arq import create_pool
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
 from app.api.v1.routers.product_router import router as product_router
+from app.core.config import get_redis_settings
+from app.core.logger import setup_logging
+from app.core.loop import install_uvloop
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[dict, None]:
     """Управление жизненным циклом приложения."""
     logger.info("Инициализация приложения...")
+    # Пул соединений с Redis для постановки задач парсинга в очередь
+    app.state.arq = await create_pool(get_redis_settings())
     yield
+    await app.state.arq.aclose()
     logger.info("Завершение работы приложения...")
+    await logger.complete()
 
 
 def create_app() -> FastAPI:
@@ -23,9 +32,12 @@ def create_app() -> FastAPI:
     Returns:
         Сконфигурированное приложение FastAPI
     """
+    setup_logging()
+
     app = FastAPI(
         title="Микросервис для парсинга данных о товарах с сайта Wildberries",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # Настройка CORS
@@ -59,5 +71,8 @@ def register_routers(app: FastAPI) -> None:
     app.include_router(product_router, tags=["products"], prefix="/api")
 
 
+# uvloop вместо стандартного цикла событий (uvicorn и так выбирает его, если установлен)
+install_uvloop()
+
 # Создание экземпляра приложения
 app = create_app()
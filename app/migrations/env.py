@@ -4,8 +4,7 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
-from sqlalchemy.ext.asyncio import (async_engine_from_config,
-                                    create_async_engine)
+from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.core.config import database_url
 from app.db.database import Base
@@ -26,7 +25,6 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
-connectable = create_async_engine(database_url, echo=True)
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
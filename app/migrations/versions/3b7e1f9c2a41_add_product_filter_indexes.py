@@ -0,0 +1,42 @@
+"""add product filter indexes
+
+Revision ID: 3b7e1f9c2a41
+Revises: 0f054ec8b00c
+Create Date: 2026-10-14 10:12:03.418265
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7e1f9c2a41"
+down_revision: Union[str, None] = "0f054ec8b00c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_products_name_trgm",
+        "products",
+        ["product_name"],
+        postgresql_using="gin",
+        postgresql_ops={"product_name": "gin_trgm_ops"},
+    )
+    op.create_index("ix_products_category", "products", ["category"])
+    op.create_index("ix_products_price", "products", ["price"])
+    op.create_index("ix_products_rating", "products", ["rating"])
+    op.create_index("ix_products_reviews_count", "products", ["reviews_count"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_reviews_count", table_name="products")
+    op.drop_index("ix_products_rating", table_name="products")
+    op.drop_index("ix_products_price", table_name="products")
+    op.drop_index("ix_products_category", table_name="products")
+    op.drop_index("ix_products_name_trgm", table_name="products")
@@ -0,0 +1,32 @@
+"""add search_query rating index
+
+Revision ID: 9c4d2e7a5b18
+Revises: 3b7e1f9c2a41
+Create Date: 2026-10-14 10:47:21.093512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4d2e7a5b18"
+down_revision: Union[str, None] = "3b7e1f9c2a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_products_sq_rating_reviews",
+        "products",
+        ["search_query", sa.text("rating DESC"), sa.text("reviews_count DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_products_sq_rating_reviews", table_name="products")
@@ -0,0 +1,42 @@
+"""product_id bigint
+
+Revision ID: e5a08b3f6d27
+Revises: 9c4d2e7a5b18
+Create Date: 2026-10-14 12:05:44.731902
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a08b3f6d27"
+down_revision: Union[str, None] = "9c4d2e7a5b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "products",
+        "product_id",
+        existing_type=sa.String(length=50),
+        type_=sa.BigInteger(),
+        existing_nullable=False,
+        postgresql_using="product_id::bigint",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "products",
+        "product_id",
+        existing_type=sa.BigInteger(),
+        type_=sa.String(length=50),
+        existing_nullable=False,
+        postgresql_using="product_id::varchar(50)",
+    )
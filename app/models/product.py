@@ -1,7 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import TIMESTAMP, Float, Integer, Numeric, String, func
+from sqlalchemy import (DDL, TIMESTAMP, BigInteger, Float, Index, Integer,
+                        Numeric, String, event, func)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
@@ -10,14 +11,24 @@ from app.db.database import Base
 class Product(Base):
     """Модель для хранения данных о товарах Wildberries"""
 
+    __table_args__ = (
+        # Триграммный индекс для поиска по подстроке (ILIKE '%query%')
+        Index(
+            "ix_products_name_trgm",
+            "product_name",
+            postgresql_using="gin",
+            postgresql_ops={"product_name": "gin_trgm_ops"},
+        ),
+    )
+
     product_name: Mapped[str] = mapped_column(String(255))
-    price: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+    price: Mapped[Decimal] = mapped_column(Numeric(12, 2), index=True)
     discount_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=True)
-    rating: Mapped[float] = mapped_column(Float)
-    reviews_count: Mapped[int] = mapped_column(Integer)
-    product_id: Mapped[str] = mapped_column(String(50), unique=True)  # ID из WB
+    rating: Mapped[float] = mapped_column(Float, index=True)
+    reviews_count: Mapped[int] = mapped_column(Integer, index=True)
+    product_id: Mapped[int] = mapped_column(BigInteger, unique=True)  # ID из WB
     product_url: Mapped[str] = mapped_column(String(500))
-    category: Mapped[str] = mapped_column(String(100))
+    category: Mapped[str] = mapped_column(String(100), index=True)
     search_query: Mapped[str] = mapped_column(String(200))
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=False), server_default=func.now()
@@ -25,3 +36,19 @@ class Product(Base):
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=True
     )
+
+
+# Выборка товаров по поисковому запросу, отсортированных по рейтингу и отзывам
+Index(
+    "ix_products_sq_rating_reviews",
+    Product.search_query,
+    Product.rating.desc(),
+    Product.reviews_count.desc(),
+)
+
+# Расширение pg_trgm нужно для ix_products_name_trgm при создании таблицы через metadata
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
@@ -1,14 +1,33 @@
 from datetime import datetime
-from decimal import Decimal
-from typing import List, Optional
+from decimal import ROUND_HALF_UP, Decimal
+from typing import AsyncIterator, Optional, Sequence
 
 from loguru import logger
-from sqlalchemy import select, update
+from sqlalchemy import RowMapping, Select, and_, select
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.product import Product
 
+# Точность Numeric(12, 2): цены округляются так же, как в Postgres, до сравнения
+# с сохраненными значениями
+PRICE_QUANT = Decimal("0.01")
+
+
+def _to_price(value) -> Decimal:
+    """
+    Приведение цены к Decimal с точностью колонки.
+
+    Decimal и int конвертируются напрямую, float - через str, чтобы получить
+    его короткое десятичное представление, а не двоичное (80.1 -> 80.1, а не
+    80.099999...).
+    """
+    if not isinstance(value, (Decimal, int)):
+        value = str(value)
+    return Decimal(value).quantize(PRICE_QUANT, rounding=ROUND_HALF_UP)
+
 
 class ProductRepository:
     """
@@ -19,10 +38,40 @@ class ProductRepository:
         - Создание и обновление товаров
         - Пакетные операции с товарами
 
+    Методы записи не фиксируют транзакцию: коммит выполняет владелец сессии,
+    например задача parse_job воркера после сохранения всех товаров.
+    При ошибке БД транзакция откатывается.
+
     Attributes:
         session (AsyncSession): Асинхронная сессия SQLAlchemy для работы с БД
     """
 
+    # Поля, перезаписываемые при повторном сохранении товара
+    UPSERT_FIELDS = (
+        "product_name",
+        "price",
+        "discount_price",
+        "rating",
+        "reviews_count",
+        "product_url",
+        "category",
+        "search_query",
+    )
+
+    # Строк в одном запросе: asyncpg принимает не больше 32767 параметров,
+    # а на строку upsert их уходит 11
+    BATCH_SIZE = 1000
+
+    # Колонки, возвращаемые при выводе списка товаров
+    LIST_COLUMNS = (
+        Product.id,
+        Product.product_name,
+        Product.price,
+        Product.discount_price,
+        Product.rating,
+        Product.reviews_count,
+    )
+
     def __init__(self, session: AsyncSession):
         """
         Инициализация репозитория.
@@ -31,7 +80,7 @@ class ProductRepository:
         """
         self.session = session
 
-    async def find_one_or_none_by_id(self, product_id: str) -> Optional[Product]:
+    async def find_one_or_none_by_id(self, product_id: int) -> Optional[Product]:
         """
         Поиск товара по ID Wildberries.
 
@@ -51,7 +100,7 @@ class ProductRepository:
             )
             return result.scalars().first()
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске товара: {str(e)}")
+            logger.error("Ошибка при поиске товара: {}", e)
             raise
 
     async def find_all_by_filters(
@@ -63,7 +112,8 @@ class ProductRepository:
         max_price: Optional[Decimal] = None,
         min_rating: Optional[float] = None,
         min_reviews_count: Optional[int] = None,
-    ) -> List[Product]:
+        exact_match: bool = False,
+    ) -> Sequence[RowMapping]:
         """
          Поиск товаров с применением фильтров.
 
@@ -75,37 +125,116 @@ class ProductRepository:
             max_price: Максимальная цена (включительно)
             min_rating: Минимальный рейтинг (от 0 до 5)
             min_reviews_count: Минимальное количество отзывов
+            exact_match: Искать товары, сохраненные по этому же поисковому запросу,
+                вместо поиска подстроки в названии
 
         Returns:
-            List[Product]: Список товаров, удовлетворяющих условиям
+            Sequence[RowMapping]: Строки с колонками LIST_COLUMNS для товаров,
+                удовлетворяющих условиям
 
         Raises:
             SQLAlchemyError: При ошибках выполнения запроса
 
         Notes:
             - Фильтры комбинируются через логическое И
+            - Фильтр применяется, если его значение не None (в том числе 0)
             - Если все фильтры None, возвращаются все товары
+            - Товары упорядочены по убыванию рейтинга и количества отзывов
         """
 
         try:
-            query = select(Product).where(Product.product_name.ilike(f"%{search_query}%"))
-
-            if category:
-                query = query.where(Product.category == category)
-            if min_price:
-                query = query.where(Product.price >= min_price)
-            if max_price:
-                query = query.where(Product.price <= max_price)
-            if min_rating:
-                query = query.where(Product.rating >= min_rating)
-            if min_reviews_count:
-                query = query.where(Product.reviews_count >= min_reviews_count)
-
+            query = self._build_filter_query(
+                search_query,
+                limit,
+                category,
+                min_price,
+                max_price,
+                min_rating,
+                min_reviews_count,
+                exact_match,
+            )
             result = await self.session.execute(query)
-            return list(result.scalars().all())[:limit]
+            return result.mappings().all()
 
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при фильтрации товаров: {str(e)}")
+            logger.error("Ошибка при фильтрации товаров: {}", e)
+            raise
+
+    def _build_filter_query(
+        self,
+        search_query: str,
+        limit: int,
+        category: Optional[str],
+        min_price: Optional[Decimal],
+        max_price: Optional[Decimal],
+        min_rating: Optional[float],
+        min_reviews_count: Optional[int],
+        exact_match: bool,
+    ) -> Select:
+        """Запрос списка товаров по фильтрам (см. find_all_by_filters)."""
+        if exact_match:
+            conditions = [Product.search_query == search_query]
+        else:
+            conditions = [Product.product_name.ilike(f"%{search_query}%")]
+
+        if category is not None:
+            conditions.append(Product.category == category)
+        if min_price is not None:
+            conditions.append(Product.price >= min_price)
+        if max_price is not None:
+            conditions.append(Product.price <= max_price)
+        if min_rating is not None:
+            conditions.append(Product.rating >= min_rating)
+        if min_reviews_count is not None:
+            conditions.append(Product.reviews_count >= min_reviews_count)
+
+        query = select(*self.LIST_COLUMNS).where(and_(*conditions))
+
+        # Product.id делает порядок однозначным, иначе LIMIT может отдавать
+        # разные товары при равных рейтинге и отзывах
+        return query.order_by(
+            Product.rating.desc(), Product.reviews_count.desc(), Product.id
+        ).limit(limit)
+
+    async def iter_filtered(
+        self,
+        search_query: str,
+        limit: int,
+        category: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        min_rating: Optional[float] = None,
+        min_reviews_count: Optional[int] = None,
+        exact_match: bool = False,
+    ) -> AsyncIterator[RowMapping]:
+        """
+        Потоковый поиск товаров с применением фильтров.
+
+        Фильтры и порядок те же, что у find_all_by_filters, но строки читаются
+        серверным курсором по мере обхода, без загрузки всего результата в память.
+
+        Yields:
+            RowMapping: Строка с колонками LIST_COLUMNS
+
+        Raises:
+            SQLAlchemyError: При ошибках выполнения запроса
+        """
+        query = self._build_filter_query(
+            search_query,
+            limit,
+            category,
+            min_price,
+            max_price,
+            min_rating,
+            min_reviews_count,
+            exact_match,
+        )
+        try:
+            result = await self.session.stream(query)
+            async for row in result.mappings():
+                yield row
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при потоковой фильтрации товаров: {}", e)
             raise
 
     async def create_or_update(self, product_data: dict) -> Product:
@@ -113,11 +242,12 @@ class ProductRepository:
         Создание или обновление товара.
 
         Если товар с таким product_id существует - обновляет его данные,
-        иначе создает новую запись.
+        иначе создает новую запись. Выполняется одним запросом
+        INSERT ... ON CONFLICT DO UPDATE.
 
         Args:
             product_data: Словарь с данными товара. Должен содержать:
-                - product_id (str): Обязательное
+                - product_id (int/str): Обязательное
                 - product_name (str): Обязательное
                 - price (Decimal/str): Обязательное
                 - rating (float): Обязательное
@@ -137,86 +267,164 @@ class ProductRepository:
         """
 
         try:
-            product_id = str(product_data["product_id"])
-            product = await self.find_one_or_none_by_id(product_id)
-
-            if product is None:
-                # Создаем новый товар
-                product = Product(
-                    product_id=product_id,
-                    product_name=str(product_data["product_name"]),
-                    price=Decimal(str(product_data["price"])),
-                    discount_price=(
-                        Decimal(str(product_data["discount_price"]))
-                        if product_data.get("discount_price")
-                        else None
-                    ),
-                    rating=float(product_data["rating"]),
-                    reviews_count=int(product_data["reviews_count"]),
-                    product_url=str(product_data["product_url"]),
-                    category=str(product_data.get("category", "")),
-                    search_query=str(product_data.get("search_query", "")),
-                    created_at=datetime.now(),
-                )
-                self.session.add(product)
-            else:
-                # Обновляем существующий товар
-                await self.session.execute(
-                    update(Product)
-                    .where(Product.product_id == product_id)
-                    .values(
-                        product_name=str(product_data["product_name"]),
-                        price=Decimal(str(product_data["price"])),
-                        discount_price=(
-                            Decimal(str(product_data["discount_price"]))
-                            if product_data.get("discount_price")
-                            else None
-                        ),
-                        rating=float(product_data["rating"]),
-                        reviews_count=int(product_data["reviews_count"]),
-                        product_url=str(product_data["product_url"]),
-                        category=str(product_data.get("category", "")),
-                        search_query=str(product_data.get("search_query", "")),
-                        updated_at=datetime.now(),
-                    )
-                )
-
-            await self.session.commit()
-            return product
+            now = datetime.now()
+            row = self._prepare_row(product_data, now)
+            stmt = self._build_upsert_stmt([row], now).returning(Product)
+            result = await self.session.execute(
+                stmt, execution_options={"populate_existing": True}
+            )
+            return result.scalar_one()
 
         except KeyError as e:
             await self.session.rollback()
-            logger.error(f"Отсутствует обязательное поле: {str(e)}")
+            logger.error("Отсутствует обязательное поле: {}", e)
             raise ValueError(f"Отсутствует обязательное поле: {str(e)}")
         except SQLAlchemyError as e:
             await self.session.rollback()
-            logger.error(f"Ошибка БД: {str(e)}")
+            logger.error("Ошибка БД: {}", e)
             raise
         except Exception as e:
             await self.session.rollback()
-            logger.error(f"Неожиданная ошибка: {str(e)}")
+            logger.error("Неожиданная ошибка: {}", e)
             raise
 
     async def bulk_create_or_update(self, products_data: list[dict]) -> int:
         """
         Пакетное создание/обновление товаров.
 
+        Сначала одним SELECT (пачками по BATCH_SIZE) читаются текущие значения
+        уже сохраненных товаров, затем новые и изменившиеся товары сохраняются
+        запросом INSERT ... ON CONFLICT DO UPDATE по product_id, тоже пачками.
+
         Args:
            products_data: Список словарей с данными товаров
 
         Returns:
            count: Количество успешно обработанных товаров
 
+        Raises:
+            SQLAlchemyError: При ошибках работы с БД
+
         Notes:
-           - Пропускает товары с ошибками, продолжая обработку остальных
+           - Пропускает товары с некорректными данными, продолжая обработку остальных
+           - При повторе product_id в пакете сохраняется последняя запись
+           - Товары, данные которых не изменились, не перезаписываются, но
+             учитываются как успешно обработанные
            - Возвращает только количество успешных операций
         """
-        count = 0
+        now = datetime.now()
+        prepare_row = self._prepare_row
+        rows = {}
         for data in products_data:
             try:
-                await self.create_or_update(data)
-                count += 1
-                logger.info(f"Успешно сохраненено {count} товаров")
-            except Exception:
+                row = prepare_row(data, now)
+            except (KeyError, ValueError, TypeError, ArithmeticError) as e:
+                logger.error("Некорректные данные товара: {}", e)
                 continue
+            rows[row["product_id"]] = row
+
+        if not rows:
+            return 0
+
+        try:
+            existing = await self._find_existing_values(list(rows))
+            changed = [
+                row
+                for product_id, row in rows.items()
+                if existing.get(product_id) != self._upsert_values(row)
+            ]
+
+            saved = 0
+            for start in range(0, len(changed), self.BATCH_SIZE):
+                batch = changed[start:start + self.BATCH_SIZE]
+                stmt = self._build_upsert_stmt(batch, now).returning(Product.id)
+                result = await self.session.execute(stmt)
+                saved += len(result.all())
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error("Ошибка БД: {}", e)
+            raise
+
+        count = saved + len(rows) - len(changed)
+        logger.info(
+            "Успешно сохранено {} товаров, из них без изменений: {}",
+            count,
+            count - saved,
+        )
         return count
+
+    async def _find_existing_values(self, product_ids: list[int]) -> dict:
+        """
+        Текущие значения обновляемых полей для уже сохраненных товаров.
+
+        Args:
+            product_ids: Идентификаторы товаров в системе Wildberries
+
+        Returns:
+            dict: product_id -> кортеж значений UPSERT_FIELDS
+        """
+        columns = (
+            Product.product_id,
+            *(getattr(Product, field) for field in self.UPSERT_FIELDS),
+        )
+        existing = {}
+        for start in range(0, len(product_ids), self.BATCH_SIZE):
+            batch = product_ids[start:start + self.BATCH_SIZE]
+            result = await self.session.execute(
+                select(*columns).where(Product.product_id.in_(batch))
+            )
+            existing.update((row[0], tuple(row[1:])) for row in result.all())
+        return existing
+
+    def _upsert_values(self, row: dict) -> tuple:
+        """Значения обновляемых полей строки в порядке UPSERT_FIELDS."""
+        return tuple(row[field] for field in self.UPSERT_FIELDS)
+
+    def _build_upsert_stmt(self, rows: list[dict], now: datetime) -> Insert:
+        """
+        Формирует запрос INSERT ... ON CONFLICT (product_id) DO UPDATE.
+
+        Args:
+            rows: Строки, подготовленные _prepare_row
+            now: Время обновления существующих записей
+
+        Returns:
+            Insert: Запрос вставки с обновлением существующих товаров
+        """
+        stmt = pg_insert(Product).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[Product.product_id],
+            set_={
+                **{field: stmt.excluded[field] for field in self.UPSERT_FIELDS},
+                "updated_at": now,
+            },
+        )
+
+    @staticmethod
+    def _prepare_row(product_data: dict, now: datetime) -> dict:
+        """
+        Приведение данных товара к типам колонок таблицы products.
+
+        Args:
+            product_data: Словарь с данными товара
+            now: Время создания записи
+
+        Returns:
+            dict: Строка для вставки в таблицу
+
+        Raises:
+            KeyError: При отсутствии обязательных полей
+        """
+        discount_price = product_data.get("discount_price")
+        return {
+            "product_id": int(product_data["product_id"]),
+            "product_name": str(product_data["product_name"]),
+            "price": _to_price(product_data["price"]),
+            "discount_price": _to_price(discount_price) if discount_price else None,
+            "rating": float(product_data["rating"]),
+            "reviews_count": int(product_data["reviews_count"]),
+            "product_url": str(product_data["product_url"]),
+            "category": str(product_data.get("category", "")),
+            "search_query": str(product_data.get("search_query", "")),
+            "created_at": now,
+        }
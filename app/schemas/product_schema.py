@@ -1,20 +1,24 @@
 import uuid
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class SProductResponse(BaseModel):
     id: uuid.UUID
     product_name: str
     price: Decimal
-    discount_price: Decimal
+    discount_price: Optional[Decimal]
     rating: float
     reviews_count: int
 
-    model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SProductsList(BaseModel):
     products: List[SProductResponse]
+
+
+# Валидатор и сериализатор списка товаров, собирается один раз при импорте
+PRODUCTS_ADAPTER = TypeAdapter(List[SProductResponse])
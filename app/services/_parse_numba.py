@@ -0,0 +1,60 @@
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba не установлен
+    njit = None
+
+
+def _compute_prices_numpy(
+    price_u: np.ndarray, sale_u: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """То же, что _compute_prices_loop, векторно на NumPy (используется без numba)."""
+    original = price_u / 100.0
+    sale = sale_u / 100.0
+    has_discount = (sale > 0) & (sale < original)
+    price = np.where(has_discount, original, np.where(sale > 0, sale, original))
+    discount = np.where(has_discount, sale, np.nan)
+    return price, discount, has_discount
+
+
+def _compute_prices_loop(
+    price_u: np.ndarray, sale_u: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Расчет цены и цены со скидкой в рублях для пакета товаров.
+
+    Args:
+        price_u: Исходные цены в копейках (priceU), int64.
+        sale_u: Цены продажи в копейках (salePriceU), 0 - если нет, int64.
+
+    Returns:
+        Кортеж массивов (цена, цена со скидкой, признак скидки). Цена со скидкой
+        имеет смысл только там, где признак скидки True (в остальных - NaN).
+    """
+    n = price_u.shape[0]
+    price = np.empty(n, dtype=np.float64)
+    discount = np.empty(n, dtype=np.float64)
+    has_discount = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        original = price_u[i] / 100.0
+        sale = sale_u[i] / 100.0
+        if 0 < sale < original:
+            price[i] = original
+            discount[i] = sale
+            has_discount[i] = True
+        else:
+            price[i] = sale if sale > 0 else original
+            discount[i] = np.nan
+            has_discount[i] = False
+    return price, discount, has_discount
+
+
+# fastmath не используется: он допускает отсутствие NaN и может менять результат
+# деления на 100 по сравнению с обычной арифметикой
+if njit is not None:
+    compute_prices = njit(cache=True)(_compute_prices_loop)
+else:
+    compute_prices = _compute_prices_numpy
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class ParsedProduct:
+    """
+    Товар, полученный из поисковой выдачи Wildberries.
+
+    Компактная запись без словаря атрибутов: парсер создает их тысячами,
+    а в словарь товар превращается только при сохранении в БД.
+
+    Attributes:
+        product_id (int): Идентификатор товара на Wildberries.
+        product_name (str): Название товара.
+        price (float): Цена в рублях.
+        discount_price (Optional[float]): Цена со скидкой, если она меньше цены.
+        rating (float): Рейтинг.
+        reviews_count (int): Количество отзывов.
+        product_url (str): Ссылка на карточку товара.
+        category (str): Категория товара.
+        search_query (str): Поисковый запрос, по которому найден товар.
+    """
+
+    product_id: int
+    product_name: str
+    price: float
+    discount_price: Optional[float]
+    rating: float
+    reviews_count: int
+    product_url: str
+    category: str = ""
+    search_query: str = ""
@@ -1,11 +1,13 @@
+from dataclasses import asdict
 from decimal import Decimal
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, Optional, Sequence, Union
 
 from loguru import logger
+from sqlalchemy import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.product import Product
 from app.repositories.product_repo import ProductRepository
+from app.services.models import ParsedProduct
 
 
 class ProductService:
@@ -30,14 +32,17 @@ class ProductService:
         self.session = session
         self.repo = ProductRepository(session)
 
-    async def process_products(self, products_data: list[dict]) -> int:
+    async def process_products(
+            self, products_data: Iterable[Union[ParsedProduct, dict]]
+    ) -> int:
         """
         Пакетная обработка и сохранение товаров.
 
-        Принимает сырые данные товаров, валидирует и сохраняет в БД.
-        Если товар существует - обновляет его данные.
-        :param products_data: Список словарей с данными товаров. Каждый словарь должен содержать:
-                - product_id (str): Уникальный ID товара
+        Принимает товары от парсера, валидирует и сохраняет в БД.
+        Если товар существует - обновляет его данные. ParsedProduct превращается
+        в словарь только здесь, перед передачей в репозиторий.
+        :param products_data: Товары (ParsedProduct или словари). Каждый должен содержать:
+                - product_id (int): Уникальный ID товара
                 - name (str): Название товара
                 - price (Decimal): Цена
                 - rating (float): Рейтинг
@@ -52,10 +57,14 @@ class ProductService:
             Exception: При других непредвиденных ошибках
         """
         try:
-            logger.info(f"Начинаем сохранение {len(products_data)} товаров")
-            return await self.repo.bulk_create_or_update(products_data)
+            rows = [
+                asdict(product) if isinstance(product, ParsedProduct) else product
+                for product in products_data
+            ]
+            logger.info("Начинаем сохранение {} товаров", len(rows))
+            return await self.repo.bulk_create_or_update(rows)
         except Exception as e:
-            logger.error(f"Ошибка обработки товаров: {str(e)}")
+            logger.error("Ошибка обработки товаров: {}", e)
             raise
 
     async def product_list(
@@ -67,7 +76,8 @@ class ProductService:
             max_price: Optional[Decimal] = None,
             min_rating: Optional[float] = None,
             min_reviews_count: Optional[int] = None,
-    ) -> List[Product]:
+            exact_match: bool = False,
+    ) -> Sequence[RowMapping]:
         """
         Получение отфильтрованного списка товаров из БД.
         :param search_query: Поисковый запрос(Содержится в названии продукта)
@@ -77,8 +87,9 @@ class ProductService:
         :param max_price: Максимальная цена товара (включительно)
         :param min_rating: Минимальный рейтинг товара (от 0 до 5)
         :param min_reviews_count: Минимальное количество отзывов
+        :param exact_match: Искать по сохраненному поисковому запросу, а не по названию
 
-        :return: List[Product]: Список ORM-моделей товаров, удовлетворяющих фильтрам
+        :return: Sequence[RowMapping]: Строки с полями товаров, удовлетворяющих фильтрам
 
         Raises:
             SQLAlchemyError: При ошибках запроса к БД
@@ -90,11 +101,18 @@ class ProductService:
         """
         try:
             logger.info(
-                f"Получаем список товаров по фильтрам: category - {category},"
-                f"min_price - {min_price},"
-                f"max_price - {max_price},"
-                f"min_rating - {min_rating},"
-                f"min_reviews_count - {min_reviews_count}"
+                "Получаем список товаров по фильтрам: category - {},"
+                "min_price - {},"
+                "max_price - {},"
+                "min_rating - {},"
+                "min_reviews_count - {},"
+                "exact_match - {}",
+                category,
+                min_price,
+                max_price,
+                min_rating,
+                min_reviews_count,
+                exact_match,
             )
             return await self.repo.find_all_by_filters(
                 search_query=search_query,
@@ -104,7 +122,43 @@ class ProductService:
                 max_price=max_price,
                 min_rating=min_rating,
                 min_reviews_count=min_reviews_count,
+                exact_match=exact_match,
             )
         except Exception as e:
-            logger.error(f"Ошибка получения списка товаров: {str(e)}")
+            logger.error("Ошибка получения списка товаров: {}", e)
             raise
+
+    def iter_product_list(
+            self,
+            search_query: str,
+            limit: int,
+            category: Optional[str] = None,
+            min_price: Optional[Decimal] = None,
+            max_price: Optional[Decimal] = None,
+            min_rating: Optional[float] = None,
+            min_reviews_count: Optional[int] = None,
+            exact_match: bool = False,
+    ) -> AsyncIterator[RowMapping]:
+        """
+        Потоковое получение отфильтрованного списка товаров из БД.
+
+        Параметры те же, что у product_list. Строки отдаются по мере чтения из БД,
+        поэтому сессия должна оставаться открытой до конца обхода.
+
+        :return: AsyncIterator[RowMapping]: Строки с полями товаров
+        """
+        logger.info(
+            "Потоковое получение списка товаров: query - {}, limit - {}",
+            search_query,
+            limit,
+        )
+        return self.repo.iter_filtered(
+            search_query=search_query,
+            limit=limit,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            min_reviews_count=min_reviews_count,
+            exact_match=exact_match,
+        )
@@ -1,11 +1,97 @@
-import json
-from typing import Dict, List
+import asyncio
+import copy
+import hashlib
+import math
+import random
+import socket
+from types import MappingProxyType
+from typing import Dict, List, Optional
 
 import aiohttp
+import numpy as np
+import orjson
+from aiohttp.abc import AbstractResolver
 from loguru import logger
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services._parse_numba import compute_prices
+from app.services.models import ParsedProduct
 from app.services.product_service import ProductService
 
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0 Safari/537.36"
+)
+
+# Заголовки одинаковы для всех запросов, поэтому задаются один раз на уровне сессии
+_DEFAULT_HEADERS = MappingProxyType(
+    {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+        # br не запрашивается: без пакета Brotli aiohttp не сможет его распаковать
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+        "Sec-Fetch-Dest": "empty",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Site": "same-site",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+    }
+)
+
+# Короткие таймауты на попытку: зависшее соединение обрывается быстро и повторяется
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=2, sock_read=5)
+
+
+def create_http_session(
+    resolver: Optional[AbstractResolver] = None,
+) -> aiohttp.ClientSession:
+    """
+    Создание HTTP-сессии с пулом keep-alive соединений для запросов к Wildberries.
+
+    Адрес хоста кэшируется на час, используется только IPv4.
+
+    Args:
+        resolver: DNS-резолвер (aiohttp.AsyncResolver); закрывает его вызывающий
+            код. Если не передан, коннектор создает и закрывает резолвер сам.
+
+    Returns:
+        Сессия с заголовками по умолчанию, которую нужно закрыть после использования.
+    """
+    return aiohttp.ClientSession(
+        headers=_DEFAULT_HEADERS,
+        connector=aiohttp.TCPConnector(
+            resolver=resolver,
+            use_dns_cache=True,
+            ttl_dns_cache=3600,
+            family=socket.AF_INET,
+            limit=64,
+            limit_per_host=8,
+            keepalive_timeout=60,
+            ssl=False,
+        ),
+    )
+
+
+async def log_search_address(
+    resolver: AbstractResolver, host: str = "search.wb.ru"
+) -> None:
+    """
+    Логирование IPv4-адреса, в который резолвится хост поиска Wildberries.
+
+    Args:
+        resolver: Тот же резолвер, что передан в create_http_session.
+        host: Имя хоста API поиска.
+    """
+    try:
+        addresses = await resolver.resolve(host, 443, family=socket.AF_INET)
+    except OSError as e:
+        logger.warning("Не удалось определить адрес {}: {}", host, e)
+        return
+    logger.info("{} резолвится в {}", host, addresses[0]["host"])
+
 
 class WildberriesParser:
     """
@@ -15,56 +101,101 @@ class WildberriesParser:
     Поддерживает асинхронные запросы и обработку ошибок.
 
     Attributes:
-        ua (str): User-Agent для HTTP-запросов.
         base_url (str): Базовый URL сайта Wildberries.
         search_url (str): URL API для поиска товаров.
         product_service (ProductService): Сервис для работы с товарами.
         limit (int): Максимальное количество товаров для парсинга.
+        page_size (int): Количество товаров на одной странице выдачи API.
+        max_concurrent_pages (int): Сколько страниц запрашивается одновременно
+            одним парсером, в том числе по разным запросам.
+        max_attempts (int): Сколько раз запрашивается страница при ошибках 5xx,
+            сетевых ошибках и таймаутах.
+        search_cache (TTLCache): Общий для всех экземпляров кэш результатов поиска
+            по (query, category, limit).
+        page_cache (TTLCache): Хэш тела и разобранные товары (ParsedProduct)
+            последней полученной версии каждой страницы выдачи.
+        http (Optional[aiohttp.ClientSession]): Общая HTTP-сессия приложения.
     """
 
-    def __init__(self, product_service: ProductService, limit: int):
+    page_size = 100
+    max_concurrent_pages = 8
+    max_attempts = 3
+    search_cache = TTLCache(maxsize=256, ttl=settings.WB_SEARCH_CACHE_TTL)
+    page_cache = TTLCache(maxsize=256, ttl=900)
+
+    def __init__(
+        self,
+        product_service: ProductService,
+        limit: int,
+        http: Optional[aiohttp.ClientSession] = None,
+    ):
         """
         Инициализация парсера.
 
         Args:
             product_service: Сервис для сохранения товаров в БД.
             limit: Максимальное количество товаров для парсинга.
+            http: Общая HTTP-сессия с пулом keep-alive соединений. Если не передана,
+                парсер при первом запросе создает свою сессию и переиспользует ее
+                до вызова close().
         """
-        self.ua = (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0 Safari/537.36"
-        )
         self.base_url = "https://www.wildberries.ru"
+        # Ссылка на карточку собирается из готовых частей без форматирования строки
+        self._url_prefix = f"{self.base_url}/catalog/"
+        self._url_suffix = "/detail.aspx"
         self.search_url = "https://search.wb.ru/exactmatch/ru/common/v4/search"
         self.product_service = product_service
         self.limit = limit
-
-    async def search_products(self, query: str) -> List[Dict]:
+        self.http = http
+        self._owns_http = False
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+
+    def _get_http(self) -> aiohttp.ClientSession:
+        """Возвращает переданную HTTP-сессию или лениво создает собственную."""
+        if self.http is None or self.http.closed:
+            self.http = create_http_session()
+            self._owns_http = True
+        return self.http
+
+    async def close(self) -> None:
+        """Закрывает HTTP-сессию, если она была создана самим парсером."""
+        if self._owns_http and self.http is not None:
+            await self.http.close()
+            self.http = None
+            self._owns_http = False
+
+    async def search_products(
+        self, query: str, category: str = ""
+    ) -> List[ParsedProduct]:
         """
         Асинхронный поиск товаров через API Wildberries.
 
-        Выполняет запрос к API Wildberries и возвращает список товаров.
+        Запрашивает страницы выдачи API Wildberries параллельно (не более
+        max_concurrent_pages одновременно) и возвращает список товаров.
+        Непустые результаты кэшируются на WB_SEARCH_CACHE_TTL секунд; из кэша
+        возвращается копия, которую вызывающий код может изменять.
 
         Args:
             query: Поисковый запрос (например, "телефон").
+            category: Категория, которая проставляется товарам (по умолчанию "").
 
         Returns:
-            Список словарей с данными товаров. Каждый словарь содержит:
-                - product_id: Идентификатор товара
-                - product_name: Название товара
-                - price: Цена
-                - discount_price: Цена со скидкой (если есть)
-                - rating: Рейтинг
-                - reviews_count: Количество отзывов
-                - product_url: Ссылка на товар
-                - category: Категория товара
-                - search_query: Поисковый запрос
+            Список найденных товаров (ParsedProduct).
 
         Examples:
             >> products = await parser.search_products("телефон")
             >> len(products)
             100
         """
+        cache_key = (query, category, self.limit)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Результаты поиска '{}' взяты из кэша", query)
+            return copy.deepcopy(cached)
+
+        per_page = min(self.limit, self.page_size)
+        pages = math.ceil(self.limit / per_page) if per_page > 0 else 0
+
         params = {
             "TestGroup": "no_test",
             "TestID": "no_test",
@@ -76,68 +207,149 @@ class WildberriesParser:
             "spp": "0",
             "suppressSpellcheck": "false",
             "query": query,
-            "page": 1,
-            "limit": self.limit,
-        }
-
-        headers = {
-            "User-Agent": self.ua,
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-site",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
+            "limit": per_page,
         }
 
         try:
-            logger.info(f"Поиск товаров: {query}")
-            async with aiohttp.ClientSession(headers=headers) as session:
+            logger.info("Поиск товаров: {}, страниц: {}", query, pages)
+            session = self._get_http()
+
+            async def guarded(page: int) -> List[ParsedProduct]:
+                async with self._semaphore:
+                    return await self._fetch_page(
+                        session, {**params, "page": page}, category
+                    )
+
+            results = await asyncio.gather(
+                *(guarded(page) for page in range(1, pages + 1))
+            )
+
+            parsed_products = [product for page in results for product in page]
+
+            logger.info(
+                "API вернул {} товаров, запрошено: {}", len(parsed_products), self.limit
+            )
+
+            if len(parsed_products) > self.limit:
+                parsed_products = parsed_products[: self.limit]
+                logger.info("Ограничили до {} товаров", self.limit)
+
+            if parsed_products:
+                self.search_cache.set(cache_key, copy.deepcopy(parsed_products))
+            return parsed_products
+
+        except Exception as e:
+            logger.error("Неожиданная ошибка: {}", e)
+            return []
+
+    async def _fetch_page(
+        self, session: aiohttp.ClientSession, params: Dict, category: str = ""
+    ) -> List[ParsedProduct]:
+        """
+        Запрос и разбор одной страницы результатов поиска.
+
+        Успешным считается любой ответ 2xx/3xx (response.ok). Если тело ответа
+        побайтно совпадает с прошлым ответом для той же страницы (по blake2b),
+        JSON не разбирается повторно, а возвращаются копии сохраненных товаров.
+        При ответах 5xx, сетевых ошибках и таймаутах запрос повторяется
+        до max_attempts раз с экспоненциальной задержкой и случайным разбросом.
+        Ответы 4xx не повторяются.
+
+        Args:
+            session: HTTP-сессия для запроса.
+            params: Параметры запроса, включая номер страницы.
+            category: Категория, которая проставляется товарам.
+
+        Returns:
+            Список товаров страницы или пустой список при ошибке.
+        """
+        for attempt in range(self.max_attempts):
+            if attempt:
+                await asyncio.sleep(0.2 * 2**attempt + random.random() * 0.1)
+
+            try:
                 async with session.get(
-                    self.search_url, params=params, ssl=False, timeout=30
+                    self.search_url,
+                    params=params,
+                    timeout=_REQUEST_TIMEOUT,
                 ) as response:
-                    if response.status != 200:
-                        logger.error(f"Ошибка ответа от сервера: {response.status}")
+                    if not response.ok:
+                        if response.status >= 500:
+                            logger.warning(
+                                "Ошибка ответа от сервера: {}, попытка {}",
+                                response.status,
+                                attempt + 1,
+                            )
+                            continue
+                        logger.error("Ошибка ответа от сервера: {}", response.status)
                         return []
 
-                    try:
-                        data = await response.json()
-                    except aiohttp.ContentTypeError:
-
-                        text = await response.text()
-                        try:
-                            data = json.loads(text)
-                        except json.JSONDecodeError:
-                            logger.error("Не удалось распарсить ответ как JSON")
-                            logger.debug(f"Текст ответа: {text[:500]}...")
-                            return []
+                    # Тело разбирается из байтов как есть: orjson не нужен
+                    # промежуточный str, а Content-Type ответа WB не всегда
+                    # application/json
+                    raw = await response.read()
+                    digest = hashlib.blake2b(raw, digest_size=16).digest()
+                    page_key = (
+                        params["query"],
+                        category,
+                        params["limit"],
+                        params["page"],
+                    )
+                    cached = self.page_cache.get(page_key)
+                    if cached is not None and cached[0] == digest:
+                        return [copy.copy(product) for product in cached[1]]
 
-                    products_data = data.get("data", {}).get("products", [])
+                    try:
+                        products = self._decode_products(raw)
+                    except orjson.JSONDecodeError:
+                        logger.error("Не удалось распарсить ответ как JSON")
+                        # Начало тела логируется как байты, без декодирования в str
+                        logger.debug("Начало ответа: {!r}", raw[:500])
+                        return []
 
-                    logger.info(
-                        f"API вернул {len(products_data)} товаров, запрошено: {self.limit}"
+                    # В кэше хранятся только компактные ParsedProduct, без сырых данных
+                    parsed_products = self._parse_products(
+                        products, params["query"], category
                     )
+                    if parsed_products:
+                        self.page_cache.set(page_key, (digest, tuple(parsed_products)))
+                    return parsed_products
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(
+                    "Ошибка запроса страницы {}, попытка {}: {}",
+                    params["page"],
+                    attempt + 1,
+                    e,
+                )
+
+        logger.error(
+            "Страница {} не получена за {} попыток", params["page"], self.max_attempts
+        )
+        return []
 
-                    if len(products_data) > self.limit:
-                        products_data = products_data[: self.limit]
-                        logger.info(f"Ограничили до {self.limit} товаров")
+    def _decode_products(self, raw: bytes) -> List[Dict]:
+        """
+        Извлечение списка товаров из прочитанного тела ответа API через orjson.
 
-                    return self._parse_products(products_data)
+        Args:
+            raw: Тело ответа.
 
-        except aiohttp.ClientError as e:
-            logger.error(f"Ошибка запроса: {e}")
-            return []
-        except json.JSONDecodeError:
-            logger.error("Ошибка парсинга JSON")
-            return []
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка: {e}")
+        Returns:
+            Список сырых данных товаров или пустой список, если JSON другой структуры.
+        """
+        data = orjson.loads(raw)
+        payload = data.get("data") if isinstance(data, dict) else None
+        products = payload.get("products") if isinstance(payload, dict) else None
+        if not isinstance(products, list):
+            if data:
+                logger.warning("В ответе API нет списка товаров data.products")
             return []
+        return products
 
-    def _parse_products(self, products_data: List[Dict]) -> List[Dict]:
+    def _parse_products(
+        self, products_data: List[Dict], query: str = "", category: str = ""
+    ) -> List[ParsedProduct]:
         """
         Парсинг сырых данных товаров из API Wildberries.
 
@@ -145,55 +357,66 @@ class WildberriesParser:
 
         Args:
             products_data: Список сырых данных товаров из API.
+            query: Поисковый запрос, по которому найдены товары.
+            category: Категория товаров.
 
         Returns:
-            Список словарей с обработанными данными товаров.
+            Список обработанных товаров.
 
         Raises:
             Пропускает товары с ошибками парсинга и логирует ошибки.
         """
 
-        parsed_products = []
+        valid_products = []
+        price_u = []
+        sale_u = []
 
         for product in products_data:
             try:
-                product_id = product.get("id", "")
-                product_name = product.get("name", "").strip() or "Без названия"
-
-                original_price = product.get("priceU", 0)
-                sale_price = product.get("salePriceU", 0)
+                product_id = int(product["id"])
+                original_price = int(product.get("priceU") or 0)
+                sale_price = int(product.get("salePriceU") or 0)
+            except Exception as e:
+                logger.error("Ошибка парсинга товара: {}", e)
+                continue
+            valid_products.append((product_id, product))
+            price_u.append(original_price)
+            sale_u.append(sale_price)
 
-                original_price_rub = original_price / 100 if original_price else 0
-                sale_price_rub = sale_price / 100 if sale_price else 0
+        prices, discounts, has_discount = compute_prices(
+            np.array(price_u, dtype=np.int64), np.array(sale_u, dtype=np.int64)
+        )
 
-                if sale_price_rub > 0 and sale_price_rub < original_price_rub:
-                    price = original_price_rub
-                    discount_price = sale_price_rub
-                else:
-                    price = sale_price_rub if sale_price_rub > 0 else original_price_rub
-                    discount_price = None
+        parsed_products = []
+        url_prefix = self._url_prefix
+        url_suffix = self._url_suffix
 
+        for (product_id, product), price, discount_price, discounted in zip(
+            valid_products, prices.tolist(), discounts.tolist(), has_discount.tolist()
+        ):
+            try:
+                product_name = product.get("name", "").strip() or "Без названия"
                 rating = product.get("rating", 0)
                 review_count = product.get("feedbacks", 0)
 
-                product_url = f"{self.base_url}/catalog/{product_id}/detail.aspx"
+                product_url = "".join((url_prefix, str(product_id), url_suffix))
 
-                parsed_product = {
-                    "product_id": str(product_id),
-                    "product_name": product_name,
-                    "price": price,
-                    "discount_price": discount_price,
-                    "rating": rating,
-                    "reviews_count": review_count,
-                    "product_url": product_url,
-                    "category": "",
-                    "search_query": "",
-                }
+                parsed_product = ParsedProduct(
+                    product_id=product_id,
+                    product_name=product_name,
+                    price=price,
+                    discount_price=discount_price if discounted else None,
+                    rating=rating,
+                    reviews_count=review_count,
+                    product_url=product_url,
+                    category=category,
+                    search_query=query,
+                )
 
                 parsed_products.append(parsed_product)
 
             except Exception as e:
-                logger.error(f"Ошибка парсинга товара: {e}")
+                logger.error("Ошибка парсинга товара: {}", e)
                 continue
 
         return parsed_products
@@ -214,19 +437,39 @@ class WildberriesParser:
             >> saved_count
             50
         """
-        products_data = await self.search_products(query)
+        products_data = await self.search_products(query, category)
 
         if not products_data:
             return 0
 
-        for product in products_data:
-            product.update(
-                {
-                    "product_id": str(product["product_id"]),
-                    "search_query": query,
-                    "category": category,
-                    "product_url": f"{self.base_url}/catalog/{product['product_id']}/detail.aspx",
-                }
-            )
-
         return await self.product_service.process_products(products_data)
+
+    async def parse_and_save_many(self, queries: List[str], category: str = "") -> int:
+        """
+        Парсинг нескольких поисковых запросов одновременно и сохранение одним пакетом.
+
+        Запросы выполняются конкурентно через общую HTTP-сессию; общее число
+        одновременно загружаемых страниц ограничено max_concurrent_pages.
+
+        Args:
+            queries: Список поисковых запросов.
+            category: Категория товаров (по умолчанию "").
+
+        Returns:
+            Количество успешно сохраненных товаров.
+
+        Examples:
+            >> saved_count = await parser.parse_and_save_many(["ноутбук", "планшет"])
+            >> saved_count
+            100
+        """
+        results = await asyncio.gather(
+            *(self.search_products(query, category) for query in queries)
+        )
+
+        all_products = [product for products_data in results for product in products_data]
+
+        if not all_products:
+            return 0
+
+        return await self.product_service.process_products(all_products)
@@ -0,0 +1,75 @@
+import aiohttp
+import numpy as np
+from loguru import logger
+
+from app.core.config import get_redis_settings
+from app.core.logger import setup_logging
+from app.core.loop import install_uvloop
+from app.db.database import async_session_maker
+from app.services._parse_numba import compute_prices
+from app.services.product_service import ProductService
+from app.services.wb_parser import (
+    WildberriesParser,
+    create_http_session,
+    log_search_address,
+)
+
+
+async def startup(ctx: dict) -> None:
+    """
+    Настройка логирования, компиляция расчета цен и создание общей
+    HTTP-сессии воркера.
+    """
+    setup_logging()
+    # njit компилирует функцию при первом вызове; пустой вызов переносит
+    # компиляцию (или загрузку из кэша) со страницы первой задачи на запуск воркера
+    compute_prices(np.empty(0, np.int64), np.empty(0, np.int64))
+    ctx["resolver"] = aiohttp.AsyncResolver()
+    ctx["http"] = create_http_session(ctx["resolver"])
+    await log_search_address(ctx["resolver"])
+
+
+async def shutdown(ctx: dict) -> None:
+    """Закрытие общей HTTP-сессии воркера и ее DNS-резолвера."""
+    await ctx["http"].close()
+    await ctx["resolver"].close()
+    await logger.complete()
+
+
+async def parse_job(ctx: dict, query: str, limit: int) -> int:
+    """
+    Фоновая задача парсинга товаров с Wildberries и сохранения их в БД.
+
+    :param ctx: Контекст воркера ARQ (содержит общую HTTP-сессию).
+    :param query: Поисковый запрос (например, "телефон").
+    :param limit: Максимальное количество товаров для парсинга.
+    :return: Количество сохраненных товаров
+    """
+    async with async_session_maker() as session:
+        try:
+            service = ProductService(session=session)
+            parser = WildberriesParser(
+                product_service=service, limit=limit, http=ctx["http"]
+            )
+            result = await parser.parse_and_save(query)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error("Ошибка в задаче парсинга '{}': {}", query, e)
+            raise
+
+    logger.info("Задача парсинга '{}' завершена, сохранено {} товаров", query, result)
+    return result
+
+
+# Цикл событий воркера создается после импорта настроек, поэтому uvloop ставится здесь
+install_uvloop()
+
+
+class WorkerSettings:
+    """Настройки воркера ARQ: arq app.worker.WorkerSettings"""
+
+    functions = [parse_job]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = get_redis_settings()
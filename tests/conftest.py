@@ -8,29 +8,31 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy import StaticPool
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.api.v1.routers.product_router import _cached_product_list
 from app.core.config import database_url
+from app.core.loop import install_uvloop
 from app.db.database import Base
+from app.dependencies.repository_dep import get_session_maker
 from app.main import app
+from app.services.models import ParsedProduct
 from app.services.product_service import ProductService
 from app.services.wb_parser import WildberriesParser
 
-# Установка правильного event loop для Windows
-if os.name == "nt":
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-
-# Фикстура для event_loop
-@pytest.fixture(scope="function")
-def event_loop():
-    policy = asyncio.WindowsSelectorEventLoopPolicy()
-    loop = policy.new_event_loop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    loop.close()
+def pytest_configure(config):
+    """
+    Политика event loop для всех тестов: на Windows - selector loop,
+    на остальных ОС - uvloop, как в приложении. Сам цикл событий создает
+    pytest-asyncio, один на сессию (см. pytest.ini).
+    """
+    if os.name == "nt":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        install_uvloop()
 
 
-# Асинхронный движок БД
-@pytest.fixture(scope="function")
+# Асинхронный движок БД, один на всю сессию тестов
+@pytest.fixture(scope="session")
 async def async_engine():
     engine = create_async_engine(
         database_url,
@@ -41,8 +43,8 @@ async def async_engine():
     await engine.dispose()
 
 
-# Создание/очистка таблиц перед каждым тестом
-@pytest.fixture(scope="function", autouse=True)
+# Таблицы создаются один раз перед тестами и удаляются после всех тестов
+@pytest.fixture(scope="session", autouse=True)
 async def setup_db(async_engine):
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -51,48 +53,103 @@ async def setup_db(async_engine):
         await conn.run_sync(Base.metadata.drop_all)
 
 
-# Асинхронная сессия
+# Соединение с транзакцией, которая откатывается после теста
 @pytest.fixture(scope="function")
-async def async_session(async_engine):
-    session_maker = async_sessionmaker(bind=async_engine, expire_on_commit=False)
-    async with session_maker() as session:
-        yield session
+async def db_connection(async_engine):
+    async with async_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await trans.rollback()
+
+
+# Фабрика сессий внутри транзакции теста.
+# commit() в коде фиксирует только SAVEPOINT, поэтому тесты не видят данных друг друга
+@pytest.fixture(scope="function")
+def test_session_maker(db_connection):
+    return async_sessionmaker(
+        bind=db_connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
 
 
-# Клиент для тестирования API
+# Асинхронная сессия внутри транзакции теста
 @pytest.fixture(scope="function")
-async def async_client() -> AsyncGenerator[AsyncClient, None]:
+async def async_session(test_session_maker):
+    async with test_session_maker() as session:
+        yield session
+
+
+# Клиент для тестирования API, один на всю сессию тестов
+@pytest.fixture(scope="session")
+async def api_client() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
         yield client
 
 
+# Общий клиент без cookies, оставшихся от предыдущего теста.
+# Эндпоинты работают с БД в той же транзакции теста, что и async_session
+@pytest.fixture(scope="function")
+async def async_client(
+    api_client, test_session_maker
+) -> AsyncGenerator[AsyncClient, None]:
+    app.dependency_overrides[get_session_maker] = lambda: test_session_maker
+    yield api_client
+    app.dependency_overrides.pop(get_session_maker)
+    api_client.cookies.clear()
+
+
 # Мокаем парсер Wildberries
 @pytest.fixture
 def mock_wb_api():
     with patch("app.services.wb_parser.WildberriesParser.search_products") as mock:
         mock.return_value = [
-            {
-                "product_id": "213ca78c-bca9-4e9b-aaae-935f0a113322",
-                "product_name": "Сумка кросс-боди маленькая",
-                "price": 4990.00,
-                "discount_price": 1436.00,
-                "rating": 5,
-                "reviews_count": 287,
-            },
-            {
-                "product_id": "ac99c0da-b9c8-4b69-80b3-a9064415d5e2",
-                "product_name": "сумка багет на плечо маленькая",
-                "price": 5000.00,
-                "discount_price": 1597.00,
-                "rating": 5,
-                "reviews_count": 5894,
-            },
+            ParsedProduct(
+                product_id=213786,
+                product_name="Сумка кросс-боди маленькая",
+                price=4990.00,
+                discount_price=1436.00,
+                rating=5,
+                reviews_count=287,
+                product_url="https://www.wildberries.ru/catalog/213786/detail.aspx",
+                search_query="сумки",
+            ),
+            ParsedProduct(
+                product_id=199021,
+                product_name="сумка багет на плечо маленькая",
+                price=5000.00,
+                discount_price=1597.00,
+                rating=5,
+                reviews_count=5894,
+                product_url="https://www.wildberries.ru/catalog/199021/detail.aspx",
+                search_query="сумки",
+            ),
         ]
         yield mock
 
 
+# Результаты поиска не должны переходить между тестами через кэши парсера
+@pytest.fixture(autouse=True)
+def clear_search_cache():
+    WildberriesParser.search_cache.clear()
+    WildberriesParser.page_cache.clear()
+    yield
+    WildberriesParser.search_cache.clear()
+    WildberriesParser.page_cache.clear()
+
+
+# Ответы GET /api/products не должны переходить между тестами через кэш
+@pytest.fixture(autouse=True)
+def clear_products_cache():
+    _cached_product_list.cache_clear()
+    yield
+    _cached_product_list.cache_clear()
+
+
 # Мокаем ProductService
 @pytest.fixture
 def mock_product_service():
@@ -101,5 +158,7 @@ def mock_product_service():
 
 # Инициализируем парсер
 @pytest.fixture
-def wb_parser(mock_product_service):
-    return WildberriesParser(product_service=mock_product_service, limit=10)
+async def wb_parser(mock_product_service):
+    parser = WildberriesParser(product_service=mock_product_service, limit=10)
+    yield parser
+    await parser.close()
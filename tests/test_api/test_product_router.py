@@ -1,4 +1,16 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import orjson
 import pytest
+from arq.jobs import JobStatus
+
+from app.api.v1.routers.product_router import _cached_product_list
+from app.core.config import settings
+from app.dependencies.queue_dep import get_arq_pool
+from app.main import app
+from app.repositories.product_repo import ProductRepository
+from app.services.product_service import ProductService
 
 
 @pytest.mark.asyncio
@@ -25,3 +37,143 @@ async def test_get_product_list_by_filter(async_client):
         },
     )
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_parsing_enqueues_job(async_client):
+    """Тест постановки задачи парсинга в очередь"""
+    arq = AsyncMock()
+    arq.enqueue_job.return_value.job_id = "job-1"
+    app.dependency_overrides[get_arq_pool] = lambda: arq
+    try:
+        response = await async_client.post(
+            "/api/parse", params={"query": "велосипеды", "limit": 10}
+        )
+    finally:
+        app.dependency_overrides.pop(get_arq_pool)
+
+    assert response.status_code == 200
+    assert response.json()["job_id"] == "job-1"
+    arq.enqueue_job.assert_awaited_once_with("parse_job", "велосипеды", 10)
+
+
+@pytest.fixture
+def mock_job():
+    """Задача ARQ, статус которой задается в тесте"""
+    app.dependency_overrides[get_arq_pool] = lambda: AsyncMock()
+    with patch("app.api.v1.routers.product_router.Job") as job_cls:
+        yield job_cls.return_value
+    app.dependency_overrides.pop(get_arq_pool)
+
+
+@pytest.mark.asyncio
+async def test_parsing_status_not_found(async_client, mock_job):
+    """Тест статуса несуществующей задачи"""
+    mock_job.status = AsyncMock(return_value=JobStatus.not_found)
+
+    response = await async_client.get("/api/parse/unknown")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_parsing_status_complete(async_client, mock_job):
+    """Тест статуса успешно завершенной задачи"""
+    mock_job.status = AsyncMock(return_value=JobStatus.complete)
+    mock_job.result_info = AsyncMock(
+        return_value=SimpleNamespace(success=True, result=7)
+    )
+
+    response = await async_client.get("/api/parse/job-1")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "job_id": "job-1",
+        "status": "complete",
+        "message": "Сохранено 7 товаров",
+    }
+
+
+@pytest.mark.asyncio
+async def test_parsing_status_failed(async_client, mock_job):
+    """Тест статуса задачи, завершившейся ошибкой"""
+    mock_job.status = AsyncMock(return_value=JobStatus.complete)
+    mock_job.result_info = AsyncMock(
+        return_value=SimpleNamespace(success=False, result=RuntimeError("boom"))
+    )
+
+    response = await async_client.get("/api/parse/job-2")
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Ошибка при парсинге"
+
+
+@pytest.fixture
+async def seeded_products(async_session):
+    """Товары в БД для проверки выдачи"""
+    await ProductRepository(async_session).bulk_create_or_update(
+        [
+            {
+                "product_id": product_id,
+                "product_name": f"велосипеды {name}",
+                "price": price,
+                "discount_price": None,
+                "rating": rating,
+                "reviews_count": 10,
+                "product_url": "url",
+            }
+            for product_id, name, price, rating in [
+                (1, "горный", 20000, 5),
+                (2, "детский", 5000, 5),
+                (3, "городской", 15000, 3),
+            ]
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_product_list_returns_filtered_rows(async_client, seeded_products):
+    """Тест: эндпоинт отдает товары из БД с учетом фильтров и кэширует ответ"""
+    params = {"query": "велосипеды", "limit": 10, "min_price": 10000, "min_rating": 4}
+
+    response = await async_client.get("/api/products", params=params)
+
+    assert response.status_code == 200
+    products = response.json()["products"]
+    assert [p["product_name"] for p in products] == ["велосипеды горный"]
+    assert products[0]["price"] == "20000.00"
+
+    hits = _cached_product_list.cache_info().hits
+    cached = await async_client.get("/api/products", params=params)
+    assert cached.json() == response.json()
+    assert _cached_product_list.cache_info().hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_get_product_list_stream_matches_buffered(
+    async_client, seeded_products, monkeypatch
+):
+    """Тест: потоковый ответ совпадает с обычным для тех же фильтров"""
+    params = {"query": "велосипеды", "limit": 10, "min_rating": 4}
+    buffered = await async_client.get("/api/products", params=params)
+
+    monkeypatch.setattr(settings, "PRODUCTS_STREAM_THRESHOLD", 5)
+    streamed = await async_client.get("/api/products", params=params)
+
+    assert streamed.status_code == 200
+    assert orjson.loads(streamed.content) == buffered.json()
+    assert len(buffered.json()["products"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_product_list_stream_db_error(async_client, monkeypatch):
+    """Тест: ошибка БД до начала потока возвращается как 500, а не обрывком JSON"""
+    monkeypatch.setattr(settings, "PRODUCTS_STREAM_THRESHOLD", 5)
+    with patch.object(
+        ProductService, "iter_product_list", side_effect=RuntimeError("db down")
+    ):
+        response = await async_client.get(
+            "/api/products", params={"query": "велосипеды", "limit": 10}
+        )
+
+    assert response.status_code == 500
@@ -1,6 +1,8 @@
 from datetime import datetime
+from decimal import Decimal
 
 import pytest
+from sqlalchemy import event
 
 from app.repositories.product_repo import ProductRepository
 
@@ -9,7 +11,7 @@ from app.repositories.product_repo import ProductRepository
 async def test_create_product(async_session):
     repo = ProductRepository(async_session)
     data = {
-        "product_id": "123",
+        "product_id": 123,
         "product_name": "Test Product",
         "price": 1000,
         "discount_price": 555.55,
@@ -22,10 +24,10 @@ async def test_create_product(async_session):
     }
     product = await repo.create_or_update(data)
     assert product.id is not None
-    assert product.product_id == "123"
+    assert product.product_id == 123
 
     data = {
-        "product_id": product.id,
+        "product_id": product.product_id,
         "product_name": "Test Product",
         "price": 1000,
         "discount_price": 555.55,
@@ -39,3 +41,167 @@ async def test_create_product(async_session):
 
     product = await repo.create_or_update(data)
     assert product.rating == 5
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_or_update(async_session):
+    repo = ProductRepository(async_session)
+    data = [
+        {
+            "product_id": 1,
+            "product_name": "First Product",
+            "price": 1000,
+            "discount_price": None,
+            "rating": 4.0,
+            "reviews_count": 3,
+            "product_url": "test_url_1",
+        },
+        {
+            "product_id": 2,
+            "product_name": "Second Product",
+            "price": 2000,
+            "discount_price": 1500,
+            "rating": 4.5,
+            "reviews_count": 10,
+            "product_url": "test_url_2",
+        },
+        {"product_id": 3, "product_name": "Broken Product"},
+    ]
+    assert await repo.bulk_create_or_update(data) == 2
+
+    data[0]["rating"] = 5
+    assert await repo.bulk_create_or_update(data[:1]) == 1
+
+    product = await repo.find_one_or_none_by_id(1)
+    await async_session.refresh(product)
+    assert product.rating == 5
+
+
+@pytest.mark.asyncio
+async def test_iter_filtered_matches_find_all(async_session):
+    repo = ProductRepository(async_session)
+    await repo.bulk_create_or_update(
+        [
+            {
+                "product_id": product_id,
+                "product_name": f"product {product_id}",
+                "price": 100 * product_id,
+                "discount_price": None,
+                "rating": rating,
+                "reviews_count": product_id,
+                "product_url": "test_url",
+            }
+            for product_id, rating in [(1, 4.0), (2, 5.0), (3, 3.0), (4, 5.0)]
+        ]
+    )
+    filters = {"search_query": "product", "limit": 3, "min_rating": 4}
+
+    streamed = [dict(row) async for row in repo.iter_filtered(**filters)]
+
+    assert streamed == [dict(row) for row in await repo.find_all_by_filters(**filters)]
+    assert [row["product_name"] for row in streamed] == [
+        "product 4",
+        "product 2",
+        "product 1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_or_update_large_batch(async_session):
+    repo = ProductRepository(async_session)
+    data = [
+        {
+            "product_id": product_id,
+            "product_name": f"product {product_id}",
+            "price": 100,
+            "discount_price": None,
+            "rating": 4.0,
+            "reviews_count": 1,
+            "product_url": "test_url",
+        }
+        for product_id in range(1, 3502)
+    ]
+
+    assert await repo.bulk_create_or_update(data) == 3501
+
+    data[-1]["rating"] = 5.0
+    assert await repo.bulk_create_or_update(data) == 3501
+    product = await repo.find_one_or_none_by_id(3501)
+    await async_session.refresh(product)
+    assert product.rating == 5.0
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_or_update_skips_unchanged(async_session):
+    repo = ProductRepository(async_session)
+    data = {
+        "product_id": 10,
+        "product_name": "Same Product",
+        "price": 999.99,
+        "discount_price": 555.55,
+        "rating": 4.3,
+        "reviews_count": 8,
+        "product_url": "test_url",
+    }
+    assert await repo.bulk_create_or_update([data]) == 1
+    product = await repo.find_one_or_none_by_id(10)
+    updated_at = product.updated_at
+
+    statements = []
+    sync_engine = async_session.bind.sync_engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        assert await repo.bulk_create_or_update([dict(data)]) == 1
+        await async_session.refresh(product)
+        assert product.updated_at == updated_at
+        assert any(s.lstrip().startswith("SELECT") for s in statements)
+        assert not any(s.lstrip().startswith("INSERT") for s in statements)
+
+        assert await repo.bulk_create_or_update([{**data, "discount_price": 500}]) == 1
+        await async_session.refresh(product)
+        assert product.discount_price == 500
+        assert product.updated_at != updated_at
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_find_all_by_filters_applies_zero_values(async_session):
+    repo = ProductRepository(async_session)
+    await repo.bulk_create_or_update(
+        [
+            {
+                "product_id": product_id,
+                "product_name": f"filter product {product_id}",
+                "price": price,
+                "discount_price": None,
+                "rating": 4.0,
+                "reviews_count": reviews_count,
+                "product_url": "test_url",
+            }
+            for product_id, price, reviews_count in [(1, 0, 0), (2, 100, 5)]
+        ]
+    )
+
+    async def names(**filters):
+        rows = await repo.find_all_by_filters(
+            search_query="filter product", limit=10, **filters
+        )
+        return sorted(row["product_name"] for row in rows)
+
+    assert await names(min_reviews_count=1) == ["filter product 2"]
+    assert await names(min_reviews_count=0) == ["filter product 1", "filter product 2"]
+    assert await names(max_price=0) == ["filter product 1"]
+
+    # Нулевые фильтры попадают в запрос, а не отбрасываются как "пустые"
+    query = repo._build_filter_query(
+        "filter product", 10, None, Decimal(0), Decimal(0), 0.0, 0, False
+    )
+    params = query.compile().params
+    assert params["price_1"] == 0 and params["price_2"] == 0
+    assert params["rating_1"] == 0
+    assert params["reviews_count_1"] == 0
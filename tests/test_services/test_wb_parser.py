@@ -1,14 +1,60 @@
+import socket
 from unittest.mock import AsyncMock, patch
 
+import aiohttp
+import orjson
 import pytest
 
+from app.services.models import ParsedProduct
+from app.services.wb_parser import (
+    WildberriesParser,
+    create_http_session,
+    log_search_address,
+)
+
+
+def wb_response(body=b"", status: int = 200) -> AsyncMock:
+    """Ответ API Wildberries с телом body (bytes или объект для JSON)"""
+    raw = body if isinstance(body, bytes) else orjson.dumps(body)
+    response = AsyncMock(status=status, ok=status < 400)
+    response.read = AsyncMock(return_value=raw)
+    return response
+
 
 @pytest.mark.asyncio
-async def test_search_products_success(wb_parser, mock_wb_api):
-    products = await wb_parser.search_products("сумки")
+async def test_search_products_success(wb_parser):
+    """Тест: товары из ответа API превращаются в ParsedProduct"""
+    body = {
+        "data": {
+            "products": [
+                {"id": 213786, "name": "Сумка кросс-боди маленькая", "priceU": 499000},
+                {"id": 199021, "name": "сумка багет на плечо", "salePriceU": 159700},
+            ]
+        }
+    }
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = wb_response(body)
+        products = await wb_parser.search_products("сумки", "bags")
 
-    assert len(products) == 2
-    assert products[0]["product_name"] == "Сумка кросс-боди маленькая"
+    assert [p.product_id for p in products] == [213786, 199021]
+    assert products[0].product_name == "Сумка кросс-боди маленькая"
+    assert products[0].price == 4990.0
+    assert products[1].price == 1597.0
+    assert all(p.search_query == "сумки" and p.category == "bags" for p in products)
+
+
+@pytest.mark.asyncio
+async def test_parse_and_save_passes_parsed_products(
+    wb_parser, mock_wb_api, mock_product_service
+):
+    """Тест: parse_and_save передает найденные товары в сервис одним пакетом"""
+    mock_product_service.process_products.return_value = 2
+
+    assert await wb_parser.parse_and_save("сумки") == 2
+    mock_wb_api.assert_awaited_once_with("сумки", "")
+    mock_product_service.process_products.assert_awaited_once_with(
+        mock_wb_api.return_value
+    )
 
 
 @pytest.mark.asyncio
@@ -16,10 +62,7 @@ async def test_search_products_empty_response(wb_parser):
     """Тест: API возвращает статус 200, но без данных"""
     with patch("aiohttp.ClientSession.get") as mock_get:
         # Мокаем ответ без данных
-        mock_response = AsyncMock()
-        mock_response.status = 200
-        mock_response.json = AsyncMock(return_value={})  # пустой JSON
-        mock_get.return_value.__aenter__.return_value = mock_response
+        mock_get.return_value.__aenter__.return_value = wb_response(b"{}")
 
         products = await wb_parser.search_products("пустой_запрос")
         assert len(products) == 0
@@ -28,11 +71,36 @@ async def test_search_products_empty_response(wb_parser):
 @pytest.mark.asyncio
 async def test_search_products_error_response(wb_parser):
     """Тест ошибки от API"""
-    with patch("aiohttp.ClientSession.get") as mock_get:
-        mock_get.return_value.__aenter__.return_value.status = 500
+    with patch("aiohttp.ClientSession.get") as mock_get, patch(
+        "app.services.wb_parser.asyncio.sleep"
+    ):
+        mock_get.return_value.__aenter__.return_value = wb_response(status=500)
 
         products = await wb_parser.search_products("тест")
         assert len(products) == 0
+        assert mock_get.call_count == WildberriesParser.max_attempts
+
+
+@pytest.mark.asyncio
+async def test_search_products_retry_after_server_error(wb_parser):
+    """Тест: после ошибки 5xx запрос повторяется, 4xx не повторяется"""
+    failed = wb_response(status=503)
+    ok = wb_response({"data": {"products": [{"id": 1, "name": "Товар"}]}})
+
+    with patch("aiohttp.ClientSession.get") as mock_get, patch(
+        "app.services.wb_parser.asyncio.sleep"
+    ) as mock_sleep:
+        mock_get.return_value.__aenter__.side_effect = [failed, ok]
+        products = await wb_parser.search_products("повтор")
+
+        assert len(products) == 1
+        assert mock_get.call_count == 2
+        mock_sleep.assert_awaited_once()
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = wb_response(status=404)
+        assert await wb_parser.search_products("нет") == []
+        assert mock_get.call_count == 1
 
 
 @pytest.mark.asyncio
@@ -54,10 +122,7 @@ async def test_parse_and_save_success(wb_parser, mock_product_service):
     }
 
     with patch("aiohttp.ClientSession.get") as mock_get:
-        mock_get.return_value.__aenter__.return_value.status = 200
-        mock_get.return_value.__aenter__.return_value.json = AsyncMock(
-            return_value=mock_response
-        )
+        mock_get.return_value.__aenter__.return_value = wb_response(mock_response)
 
         # Настраиваем мок сервиса
         mock_product_service.process_products.return_value = 1
@@ -68,6 +133,31 @@ async def test_parse_and_save_success(wb_parser, mock_product_service):
         mock_product_service.process_products.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_search_products_pages(mock_product_service):
+    """Тест: товары собираются со всех страниц и обрезаются до лимита"""
+    parser = WildberriesParser(product_service=mock_product_service, limit=150)
+    page = {
+        "data": {
+            "products": [
+                {"id": i, "name": f"Товар {i}", "priceU": 10000, "rating": 5}
+                for i in range(100)
+            ]
+        }
+    }
+
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = wb_response(page)
+
+        products = await parser.search_products("тест")
+        await parser.close()
+
+        assert len(products) == 150
+        assert mock_get.call_count == 2
+        pages = sorted(call.kwargs["params"]["page"] for call in mock_get.call_args_list)
+        assert pages == [1, 2]
+
+
 def test_parse_products(wb_parser):
     """Тест парсинга продуктов"""
     test_data = [
@@ -85,12 +175,128 @@ def test_parse_products(wb_parser):
 
     assert len(result) == 1
     product = result[0]
-    assert product["product_id"] == "123"
-    assert product["product_name"] == "Тестовый товар"
-    assert product["price"] == 100.0
-    assert product["discount_price"] == 80.0
-    assert product["rating"] == 4.5
-    assert product["reviews_count"] == 25
+    assert isinstance(product, ParsedProduct)
+    assert product.product_id == 123
+    assert product.product_name == "Тестовый товар"
+    assert product.price == 100.0
+    assert product.discount_price == 80.0
+    assert product.rating == 4.5
+    assert product.reviews_count == 25
     assert (
-        product["product_url"] == "https://www.wildberries.ru/catalog/123/detail.aspx"
+        product.product_url == "https://www.wildberries.ru/catalog/123/detail.aspx"
+    )
+
+
+@pytest.mark.asyncio
+async def test_parse_and_save_many(wb_parser, mock_product_service):
+    """Тест пакетного парсинга нескольких запросов"""
+
+    async def search(query, category):
+        return [
+            ParsedProduct(len(query), query, 1.0, None, 5, 1, "", category, query)
+        ]
+
+    with patch.object(wb_parser, "search_products", side_effect=search):
+        mock_product_service.process_products.return_value = 2
+        saved_count = await wb_parser.parse_and_save_many(["сумка", "рюкзак"], "bags")
+
+    assert saved_count == 2
+    mock_product_service.process_products.assert_called_once()
+    products = mock_product_service.process_products.call_args.args[0]
+    assert [p.search_query for p in products] == ["сумка", "рюкзак"]
+    assert all(p.category == "bags" for p in products)
+
+
+def test_parse_products_sets_query_and_category(wb_parser):
+    """Тест: запрос и категория проставляются при парсинге"""
+    result = wb_parser._parse_products([{"id": 7, "name": "Товар"}], "сумка", "bags")
+
+    assert result[0].search_query == "сумка"
+    assert result[0].category == "bags"
+
+
+@pytest.mark.asyncio
+async def test_same_page_body_is_not_decoded_twice(wb_parser):
+    """Тест: повторный одинаковый ответ берется по хэшу без разбора JSON"""
+    mock_response = wb_response({"data": {"products": [{"id": 1, "name": "Товар"}]}})
+
+    with patch("aiohttp.ClientSession.get") as mock_get, patch.object(
+        wb_parser, "_decode_products", wraps=wb_parser._decode_products
+    ) as mock_decode:
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        first = await wb_parser.search_products("хэш")
+        WildberriesParser.search_cache.clear()
+        second = await wb_parser.search_products("хэш")
+
+    assert first == second
+    assert mock_get.call_count == 2
+    mock_decode.assert_called_once()
+
+    # Изменение полученных товаров не портит сохраненную версию страницы
+    second[0].product_name = "Изменено"
+    WildberriesParser.search_cache.clear()
+    with patch("aiohttp.ClientSession.get") as mock_get:
+        mock_get.return_value.__aenter__.return_value = mock_response
+        third = await wb_parser.search_products("хэш")
+    assert third == first
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"[]", b"null", b'{"data": null}', b'{"data": {"products": null}}', b'{"data": []}'],
+)
+def test_decode_products_unexpected_shape(wb_parser, body):
+    """Тест: корректный JSON другой структуры дает пустой список, а не исключение"""
+    assert wb_parser._decode_products(body) == []
+
+
+@pytest.mark.asyncio
+async def test_search_products_keeps_pages_after_bad_page(mock_product_service):
+    """Тест: страница с неожиданным JSON не отбрасывает остальные страницы"""
+    parser = WildberriesParser(product_service=mock_product_service, limit=150)
+    good = {"data": {"products": [{"id": i, "name": "Товар"} for i in range(100)]}}
+
+    def get(url, params, **kwargs):
+        context = AsyncMock()
+        context.__aenter__.return_value = wb_response(
+            b'{"data": null}' if params["page"] == 2 else good
+        )
+        return context
+
+    with patch("aiohttp.ClientSession.get", side_effect=get):
+        products = await parser.search_products("тест")
+    await parser.close()
+
+    assert len(products) == 100
+
+
+@pytest.mark.asyncio
+async def test_create_http_session_connector():
+    """Тест настроек коннектора общей HTTP-сессии"""
+    resolver = aiohttp.AsyncResolver()
+    session = create_http_session(resolver)
+    try:
+        connector = session.connector
+        assert connector.limit == 64
+        assert connector.limit_per_host == 8
+        assert connector.family == socket.AF_INET
+        assert connector.use_dns_cache
+        assert connector._cached_hosts._ttl == 3600
+        assert connector._resolver is resolver
+    finally:
+        await session.close()
+        await resolver.close()
+
+
+@pytest.mark.asyncio
+async def test_log_search_address_uses_resolver():
+    """Тест: адрес хоста определяется через резолвер HTTP-сессии"""
+    resolver = AsyncMock()
+    resolver.resolve.return_value = [{"host": "185.62.202.2"}]
+
+    await log_search_address(resolver)
+
+    resolver.resolve.assert_awaited_once_with(
+        "search.wb.ru", 443, family=socket.AF_INET
     )
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.worker import parse_job
+
+
+@pytest.fixture
+def mock_session():
+    """Сессия БД, которую parse_job получает из async_session_maker"""
+    session = AsyncMock()
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__.return_value = session
+    with patch("app.worker.async_session_maker", session_maker):
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_parse_job_commits(mock_session):
+    """Тест: успешный парсинг фиксирует транзакцию"""
+    with patch("app.worker.WildberriesParser") as parser_cls:
+        parser_cls.return_value.parse_and_save = AsyncMock(return_value=5)
+        result = await parse_job({"http": None}, "сумка", 10)
+
+    assert result == 5
+    parser_cls.return_value.parse_and_save.assert_awaited_once_with("сумка")
+    mock_session.commit.assert_awaited_once()
+    mock_session.rollback.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_job_rolls_back_on_error(mock_session):
+    """Тест: при ошибке транзакция откатывается, а ошибка пробрасывается в ARQ"""
+    with patch("app.worker.WildberriesParser") as parser_cls:
+        parser_cls.return_value.parse_and_save = AsyncMock(
+            side_effect=RuntimeError("boom")
+        )
+        with pytest.raises(RuntimeError):
+            await parse_job({"http": None}, "сумка", 10)
+
+    mock_session.commit.assert_not_awaited()
+    mock_session.rollback.assert_awaited_once()